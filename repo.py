@@ -6,13 +6,14 @@
 
 import logging
 import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Annotated
 
 import typer
 
-from python_experiments.utils import run_shell, setup_logger
-
 _logger = logging.getLogger(__name__)
 _repo_path = Path(__file__).parent
 
@@ -25,50 +26,100 @@ app = typer.Typer(
 
 @app.callback()
 def setup_app() -> None:
+    from python_experiments.utils import setup_logger  # noqa: PLC0415
+
     logging.getLogger().setLevel(logging.INFO)
     setup_logger()
 
 
 def git_files(repo_path: Path, *ext: str) -> list[str]:
+    from python_experiments.utils import run_shell  # noqa: PLC0415
+
+    # NUL-separated output is split in a single pass and keeps unusual file names unquoted.
     return run_shell(
-        ["git", "ls-files", *[f"*{e}" for e in ext]], capture_output=True, cwd=repo_path
-    ).stdout.splitlines()
+        ["git", "ls-files", "-z", *[f"*{e}" for e in ext]], capture_output=True, cwd=repo_path
+    ).stdout.split("\0")[:-1]
+
+
+def git_files_multi(repo_path: Path, *exts: str) -> dict[str, list[str]]:
+    """List files for several extensions with a single `git` call, grouped by extension."""
+    res: dict[str, list[str]] = {e: [] for e in exts}
+    for file in git_files(repo_path, *exts):
+        for e in exts:
+            if file.endswith(e):
+                res[e].append(file)
+                break
+    return res
+
+
+def _has_commit(repo_path: Path, sha: str) -> bool:
+    from python_experiments.utils import run_shell  # noqa: PLC0415
+
+    # Loose objects can be checked without spawning `git`.
+    # Packed ones, worktrees and other layouts are left to `git` itself.
+    if (repo_path / ".git" / "objects" / sha[:2] / sha[2:]).is_file():
+        return True
+    return not run_shell(["git", "cat-file", "-e", sha], cwd=repo_path, check=False).returncode
 
 
 def _check_leaked_credentials(repo_path: Path) -> None:
+    from python_experiments.utils import run_shell  # noqa: PLC0415
+
     # In order to properly check for leaked credentials,
     # we have to iterate over all commits in the repo.
     # Pinning first commit ensures, that if the check is run on some shallow cloned repo,
     # it will throw an error.
     first_commit = "1712e58cb568cc877c1115ff57e82ed05ee97d66"
 
-    if run_shell(["git", "cat-file", "-e", first_commit], check=False).returncode:
+    if not _has_commit(repo_path, first_commit):
         _logger.error("Looks like git history is shallow and credential check cannot be performed.")
         raise RuntimeError
 
     run_shell(["gitleaks", "git"], cwd=repo_path)
 
 
+def _run_parallel(jobs: Sequence[Callable[[], object]]) -> None:
+    """Run independent jobs in threads, wait for all of them and re-raise the first failure.
+
+    Threads are enough here, since jobs spend their time waiting on subprocesses.
+    """
+    with ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+        futures = [executor.submit(job) for job in jobs]
+    errors = [exc for future in futures if (exc := future.exception()) is not None]
+    for exc in errors[1:]:
+        _logger.error(f"Another job failed: {exc}")
+    if errors:
+        raise errors[0]
+
+
 @app.command()
 def lint() -> None:
     """Lint code."""
-    run_shell(["ruff", "check"], cwd=_repo_path)
-    run_shell(["mypy", _repo_path])
+    from python_experiments.utils import run_shell  # noqa: PLC0415
 
-    run_shell(["yamllint", "--strict", _repo_path / ".github"])
-    run_shell(["typos"], cwd=_repo_path)
+    jobs: list[Callable[[], object]] = [
+        partial(run_shell, ["ruff", "check"], cwd=_repo_path),
+        partial(run_shell, ["mypy", _repo_path]),
+        partial(run_shell, ["yamllint", "--strict", _repo_path / ".github"]),
+        partial(run_shell, ["typos"], cwd=_repo_path),
+    ]
 
     if not os.getenv("IN_NIX_SHELL"):
         _logger.warning("Not running in nix shell, skipping credential and some other lint checks.")
+        _run_parallel(jobs)
         return
 
-    _check_leaked_credentials(_repo_path)
+    def shellcheck() -> None:
+        if sh_files := git_files(_repo_path, ".sh"):
+            run_shell(["shellcheck", *sh_files], cwd=_repo_path)
 
-    if sh_files := git_files(_repo_path, ".sh"):
-        run_shell(["shellcheck", *sh_files], cwd=_repo_path)
-
-    run_shell(["markdownlint-cli2", "."], cwd=_repo_path)
-    run_shell(["statix", "check", _repo_path])
+    jobs += [
+        partial(_check_leaked_credentials, _repo_path),
+        shellcheck,
+        partial(run_shell, ["markdownlint-cli2", "."], cwd=_repo_path),
+        partial(run_shell, ["statix", "check", _repo_path]),
+    ]
+    _run_parallel(jobs)
 
 
 @app.command(name="format")
@@ -80,28 +131,44 @@ def format_code(
     ] = False,
 ) -> None:
     """Format codebase."""
+    from python_experiments.utils import run_shell  # noqa: PLC0415
+
     check_arg = ["--check"] if check else []
     diff_arg = ["--diff"] if check else []
     dry_run_arg = ["--dry-run"] if check else []
     write_arg = ["--write"] if not check else []
-    run_shell(["ruff", "format", *check_arg], cwd=_repo_path)
-    run_shell(["ruff", "check", "--fix", "--unsafe-fixes", *diff_arg], cwd=_repo_path)
+    files = git_files_multi(_repo_path, ".md", ".nix")
+
+    # Jobs run in parallel, so each one must own a disjoint set of files.
+    # Tools touching the same files are chained inside a single job.
+    def python() -> None:
+        run_shell(["ruff", "format", *check_arg], cwd=_repo_path)
+        run_shell(["ruff", "check", "--fix", "--unsafe-fixes", *diff_arg], cwd=_repo_path)
+
+    def markdown() -> None:
+        run_shell(["mdformat", *files[".md"], *check_arg], cwd=_repo_path)
 
-    run_shell(["mdformat", *git_files(_repo_path, ".md"), *check_arg], cwd=_repo_path)
+    jobs: list[Callable[[], object]] = [python, markdown]
 
     if not os.getenv("IN_NIX_SHELL"):
         _logger.warning("Not running in nix shell, skipping some format tools.")
+        _run_parallel(jobs)
         return
 
-    statix_res = run_shell(["statix", "fix", *dry_run_arg, _repo_path], cwd=_repo_path, capture_output=check)
-    if check and statix_res.stdout.strip():
-        raise RuntimeError(statix_res.stdout)
+    def nix() -> None:
+        statix_res = run_shell(["statix", "fix", *dry_run_arg, _repo_path], cwd=_repo_path, capture_output=check)
+        if check and statix_res.stdout.strip():
+            raise RuntimeError(statix_res.stdout)
 
-    run_shell(["nixfmt", "--verify", "--strict", *check_arg, *git_files(_repo_path, ".nix")], cwd=_repo_path)
+        run_shell(["nixfmt", "--verify", "--strict", *check_arg, *files[".nix"]], cwd=_repo_path)
 
-    run_shell(["shfmt", *write_arg, *diff_arg, _repo_path])
-    run_shell(["prettier", *write_arg, _repo_path, *check_arg], cwd=_repo_path)
-    run_shell(["stylua", _repo_path, *check_arg], cwd=_repo_path)
+    jobs += [
+        nix,
+        partial(run_shell, ["shfmt", *write_arg, *diff_arg, _repo_path]),
+        partial(run_shell, ["prettier", *write_arg, _repo_path, *check_arg], cwd=_repo_path),
+        partial(run_shell, ["stylua", _repo_path, *check_arg], cwd=_repo_path),
+    ]
+    _run_parallel(jobs)
 
 
 if __name__ == "__main__":
@@ -1,36 +1,38 @@
-import logging
+from types import MappingProxyType
 from typing import Annotated
 
 import click
 import typer
 
-from python_experiments.utils import setup_logger
-
 app = typer.Typer(
     context_settings={"help_option_names": ["-h", "--help"]},
     help="Python experiments CLI.",
 )
 
-loglevel_map = {
-    "s": logging.DEBUG - 5,
-    "spam": logging.DEBUG - 5,
-    "d": logging.DEBUG,
-    "debug": logging.DEBUG,
-    "v": logging.INFO - 5,
-    "verbose": logging.INFO - 5,
-    "i": logging.INFO,
-    "info": logging.INFO,
-    "n": logging.WARNING - 5,
-    "notice": logging.WARNING - 5,
-    "w": logging.WARNING,
-    "warning": logging.WARNING,
-    "u": logging.ERROR - 5,
-    "success": logging.ERROR - 5,
-    "e": logging.ERROR,
-    "error": logging.ERROR,
-    "c": logging.CRITICAL,
-    "critical": logging.CRITICAL,
-}
+# Plain ints instead of `logging` constants, so `logging` is not imported for `--help`.
+loglevel_map = MappingProxyType(
+    {
+        "s": 5,
+        "spam": 5,
+        "d": 10,
+        "debug": 10,
+        "v": 15,
+        "verbose": 15,
+        "i": 20,
+        "info": 20,
+        "n": 25,
+        "notice": 25,
+        "w": 30,
+        "warning": 30,
+        "u": 35,
+        "success": 35,
+        "e": 40,
+        "error": 40,
+        "c": 50,
+        "critical": 50,
+    }
+)
+_LOGLEVEL_CHOICES = tuple(loglevel_map)
 
 
 @app.callback()
@@ -41,12 +43,17 @@ def setup_app(
         typer.Option(
             "-l",
             "--log-level",
-            click_type=click.Choice(list(loglevel_map.keys())),
+            click_type=click.Choice(_LOGLEVEL_CHOICES),
             help="Logging level.",
             case_sensitive=False,
         ),
     ] = "info",
 ) -> None:
+    # Deferred, so `--help` does not pay for `logging`, `rich.logging` and `asyncio`.
+    import logging  # noqa: PLC0415
+
+    from python_experiments.utils import setup_logger  # noqa: PLC0415
+
     logging.getLogger().setLevel(loglevel_map[loglevel])
     setup_logger()
 
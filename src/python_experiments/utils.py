@@ -1,29 +1,32 @@
 """Simple generic utils."""
 
-import asyncio
-import inspect
+import bisect
+import functools
 import logging
 import os
 import shlex
 import subprocess
 import sys
+import time
 from collections.abc import Mapping, Sequence
-from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from types import TracebackType
-from typing import Any, ClassVar, Self
+from typing import TYPE_CHECKING, Any, ClassVar, Self
 
-from rich.logging import RichHandler
+if TYPE_CHECKING:
+    import asyncio
 
 _logger = logging.getLogger(__name__)
 
 
-async def cancel_and_wait(task: asyncio.Task[Any], msg: str | None = None) -> None:
+async def cancel_and_wait(task: "asyncio.Task[Any]", msg: str | None = None) -> None:
     """Cancel the task and wait for it to finish.
 
     :param task: the asyncio Task to cancel.
     See https://superfastpython.com/asyncio-cancel-task-and-wait/
     """
+    import asyncio  # noqa: PLC0415
+
     task.cancel(msg)
     try:
         await task
@@ -52,6 +55,14 @@ async def cancel_and_wait(task: asyncio.Task[Any], msg: str | None = None) -> No
     raise RuntimeError(msg)
 
 
+_PREFIXES = {tag: f"[{tag.ljust(11)}]" for tag in ("STARTED", "FINISHED", "IN PROGRESS", "STATUS", "EXCEPTION")}
+
+
+@functools.lru_cache(maxsize=128)
+def _logger_for(module: str) -> logging.Logger:
+    return logging.getLogger(module)
+
+
 class ContextLogger:
     """Context manager for logging the start and end of a block of code."""
 
@@ -83,70 +94,51 @@ class ContextLogger:
         self.ping = ping
 
         self.__running = False
-        self.__start: datetime = datetime.fromtimestamp(0, UTC)
-        self.__ping_task: asyncio.Task[Any] | None = None
+        self.__start = 0.0
+        self.__ping_handle: asyncio.TimerHandle | None = None
 
     @staticmethod
     def _get_logger(logger: logging.Logger | None) -> logging.Logger:
         if logger is not None:
             return logger
-        logger_module = inspect.stack()[1].frame.f_globals["__name__"]
-        return logging.getLogger(logger_module)
+        # Frame 0 is this function, frame 1 is `__init__` or `status`, frame 2 is the user code.
+        logger_module = sys._getframe(2).f_globals.get("__name__", "root")  # noqa: SLF001
+        return _logger_for(logger_module)
 
     @staticmethod
     def _prefix(tag: str) -> str:
-        return f"[{tag.ljust(11)}]"
+        return _PREFIXES.get(tag) or f"[{tag.ljust(11)}]"
 
     @staticmethod
-    def _format_elapsed(elapsed: timedelta | None) -> str:
+    def _format_elapsed(elapsed: float | None) -> str:
         if elapsed is None:
             return ""
 
+        # Keep smaller units unsplit up to a threshold, e.g. "150s" instead of "2m 30s".
         jump_sec, sec_in_min = 300, 60
         jump_min, min_in_hour = 60, 60
         jump_hour, hour_in_day = 96, 24
 
-        remaining = int(elapsed.total_seconds())
-        if remaining <= jump_sec:  # noqa: SIM108
-            seconds = remaining
-        else:
-            seconds = remaining % sec_in_min
-        remaining -= seconds
-        remaining //= sec_in_min
-
-        if remaining <= jump_min:  # noqa: SIM108
-            minutes = remaining
-        else:
-            minutes = remaining % min_in_hour
-        remaining -= minutes
-        remaining //= min_in_hour
-
-        if remaining <= jump_hour:  # noqa: SIM108
-            hours = remaining
-        else:
-            hours = remaining % hour_in_day
-        remaining -= hours
-        remaining //= hour_in_day
-
-        days = remaining
-
-        res = ""
-        if days > 0:
-            res += f"{days}d "
-        if days > 0 or hours > 0:
-            res += f"{hours}h "
-        if days > 0 or hours > 0 or minutes > 0:
-            res += f"{minutes}m "
-        res += f"{seconds}s"
-        return f" [{res}]"
+        seconds = int(elapsed)
+        minutes, seconds = divmod(seconds, sec_in_min) if seconds > jump_sec else (0, seconds)
+        hours, minutes = divmod(minutes, min_in_hour) if minutes > jump_min else (0, minutes)
+        days, hours = divmod(hours, hour_in_day) if hours > jump_hour else (0, hours)
+
+        parts = []
+        if days:
+            parts.append(f"{days}d")
+        if days or hours:
+            parts.append(f"{hours}h")
+        if days or hours or minutes:
+            parts.append(f"{minutes}m")
+        parts.append(f"{seconds}s")
+        return f" [{' '.join(parts)}]"
 
     @staticmethod
-    def _format(message: str, *, tag: str, postfixes: Sequence[str] | None, elapsed: timedelta | None) -> str:
-        postfixes = postfixes or []
+    def _format(message: str, *, tag: str, postfixes: Sequence[str] | None, elapsed: float | None) -> str:
+        postfix = " ".join(postfixes) if postfixes else ""
         return (
-            f"{ContextLogger._prefix(tag)} {message.lstrip()} "
-            + " ".join(postfixes)
-            + f" {ContextLogger._format_elapsed(elapsed)}"
+            f"{ContextLogger._prefix(tag)} {message.lstrip()} {postfix} {ContextLogger._format_elapsed(elapsed)}"
         ).strip()
 
     @staticmethod
@@ -166,7 +158,7 @@ class ContextLogger:
         """Add postfix message to the last log message. Will be printed on context exit."""
         self._postfixes.append(message)
 
-    def _log(self, tag: str, elapsed: timedelta | None) -> None:
+    def _log(self, tag: str, elapsed: float | None) -> None:
         self._logger.log(
             self._level, ContextLogger._format(self._msg, tag=tag, postfixes=self._postfixes, elapsed=elapsed)
         )
@@ -177,7 +169,7 @@ class ContextLogger:
             msg = "Cannot start the same ContextLogger object if already in progress!"
             raise RuntimeError(msg)
         self.__running = True
-        self.__start = datetime.now(UTC)
+        self.__start = time.monotonic()
 
         if self._status_mode:
             return self
@@ -191,7 +183,7 @@ class ContextLogger:
         self.__running = False
 
         tag = "FINISHED"
-        elapsed: timedelta | None = datetime.now(UTC) - self.__start
+        elapsed: float | None = time.monotonic() - self.__start
         if self._status_mode:
             tag = "STATUS"
             elapsed = None
@@ -202,17 +194,20 @@ class ContextLogger:
             self.add_postfix(f"- [{exc_name}]")
         self._log(tag, elapsed=elapsed)
 
-    async def _ping(self) -> None:
-        while True:
-            await asyncio.sleep(self.ping)
-            elapsed = datetime.now(UTC) - self.__start
-            self._log("IN PROGRESS", elapsed=elapsed)
+    def _on_tick(self, loop: "asyncio.AbstractEventLoop") -> None:
+        self._log("IN PROGRESS", elapsed=time.monotonic() - self.__start)
+        if self.ping > 0:
+            self.__ping_handle = loop.call_later(self.ping, self._on_tick, loop)
 
     async def __aenter__(self) -> Self:
         """Enter the async context and log the start message. Start pinging if needed."""
+        import asyncio  # noqa: PLC0415
+
         self.__enter__()
         if self.ping > 0 and not self._status_mode:
-            self.__ping_task = asyncio.create_task(self._ping())
+            # Plain scheduled callbacks are cheaper than a background task sleeping in a loop.
+            loop = asyncio.get_running_loop()
+            self.__ping_handle = loop.call_later(self.ping, self._on_tick, loop)
 
         return self
 
@@ -220,18 +215,25 @@ class ContextLogger:
         self, exc_type: type[BaseException] | None, exc_val: BaseException | None, exc_tb: TracebackType | None
     ) -> None:
         """Exit the async context and log the end message, even if an exception is raised. Stop pinging if needed."""
-        if self.__ping_task is not None:
-            await cancel_and_wait(self.__ping_task)
+        if self.__ping_handle is not None:
+            self.__ping_handle.cancel()
+            self.__ping_handle = None
 
         self.__exit__(exc_type, exc_val, exc_tb)
 
 
 def _paths2shell(paths: Sequence[Path]) -> str:
-    # Hopefully no one is that crazy to use colon in the path...
-    if any(":" in str(p) for p in paths):
-        msg = "Cannot handle colon in paths for extra_paths argument for `run_shell`!"
-        raise ValueError(msg)
-    return ":".join([str(p) for p in paths])
+    if not paths:
+        return ""
+    parts = []
+    for p in paths:
+        s = os.fspath(p)
+        # Hopefully no one is that crazy to use colon in the path...
+        if ":" in s:
+            msg = "Cannot handle colon in paths for extra_paths argument for `run_shell`!"
+            raise ValueError(msg)
+        parts.append(s)
+    return ":".join(parts)
 
 
 def shell_command(
@@ -260,24 +262,42 @@ def shell_command(
     :param cwd: cwd for spawned command.
     """
     extra_env = extra_env or {}
-    extra_paths = extra_paths or []
+    _check_extra_env(extra_env)
+    return _shell_command_from_parts(
+        cmd,
+        extra_env=extra_env,
+        extra_paths_str=_paths2shell(extra_paths or []),
+        capture_output=capture_output,
+        cwd=cwd,
+    )
+
 
+def _check_extra_env(extra_env: Mapping[str, str | Path]) -> None:
     if "PATH" in extra_env:
         msg = "Do not pass PATH to extra_env. Use extra_paths instead."
         raise ValueError(msg)
 
-    extra_paths_str = _paths2shell(extra_paths)
+
+def _shell_command_from_parts(
+    cmd: Sequence[str | Path],
+    *,
+    extra_env: Mapping[str, str | Path],
+    extra_paths_str: str,
+    capture_output: bool,
+    cwd: Path | None,
+) -> str:
     print_cmd = ""
 
-    if cwd is not None and cwd != Path.cwd():
-        cwd_str = str(os.path.relpath(cwd, Path.cwd()))  # Use os.path.relpath since it supports "../"
-        cwd_str = shlex.quote(cwd_str)
-        print_cmd += f"cd {cwd_str} && "
+    if cwd is not None:
+        # Use os.path.relpath since it supports "../". It also reads cwd only once.
+        cwd_str = os.path.relpath(cwd)
+        if cwd_str != os.curdir:
+            print_cmd += f"cd {shlex.quote(cwd_str)} && "
 
     for k, val in extra_env.items():
         print_cmd += f"{shlex.quote(str(k))}={shlex.quote(str(val))} "
 
-    if extra_paths:
+    if extra_paths_str:
         print_cmd += f'PATH="{extra_paths_str}:${{PATH}}" '
 
     print_cmd += " ".join([shlex.quote(str(arg)) for arg in cmd])
@@ -321,25 +341,29 @@ def run_shell(  # noqa: PLR0913
     :param loglevel: loglevel for dumping bash equivalent of the command.
     """
     extra_env = dict(extra_env) if extra_env is not None else {}
-    extra_paths = list(extra_paths) if extra_paths is not None else []
+    _check_extra_env(extra_env)
+    extra_paths_str = _paths2shell(extra_paths or [])
 
-    env = os.environ.copy()
-    env.update({k: str(v) for k, v in extra_env.items()})
+    # Leave `env=None` unless customized, so the child just inherits the parent environment.
+    env: dict[str, str] | None = None
+    if extra_env or extra_paths_str:
+        env = {**os.environ, **{k: str(v) for k, v in extra_env.items()}}
 
-    extra_paths_str = _paths2shell(extra_paths).strip()
-    if extra_paths_str:
+    if env is not None and (path := extra_paths_str.strip()):
         if "PATH" in env and env["PATH"].strip():
-            extra_paths_str += ":" + env["PATH"]
-        env["PATH"] = extra_paths_str
-
-    print_cmd = shell_command(
-        cmd,
-        extra_env=extra_env,
-        extra_paths=extra_paths,
-        capture_output=capture_output,
-        cwd=cwd,
-    )
-    _logger.log(loglevel, f"[RUNNING IN SHELL]: {print_cmd}")
+            path += ":" + env["PATH"]
+        env["PATH"] = path
+
+    # Building the bash equivalent is only worth it if it is going to be printed.
+    if _logger.isEnabledFor(loglevel):
+        print_cmd = _shell_command_from_parts(
+            cmd,
+            extra_env=extra_env,
+            extra_paths_str=extra_paths_str,
+            capture_output=capture_output,
+            cwd=cwd,
+        )
+        _logger.log(loglevel, f"[RUNNING IN SHELL]: {print_cmd}")
     return subprocess.run(  # noqa: S603
         cmd,
         env=env,
@@ -360,19 +384,19 @@ class _LoggerFormatter(logging.Formatter):
 
     def __init__(self) -> None:
         super().__init__()
-        self.formatters = {level: logging.Formatter(fmt) for level, fmt in self.formats.items()}
+        self._levels = sorted(self.formats.keys())
+        self._fmts = [logging.Formatter(self.formats[level]) for level in self._levels]
 
     def format(self, record: Any) -> str:  # noqa: ANN401
-        formatter = self.formatters[logging.DEBUG]
-        for level, fmt in self.formatters.items():
-            if record.levelno >= level:
-                formatter = fmt
-
-        return formatter.format(record)
+        # Levels below the lowest one fall back to its formatter.
+        idx = bisect.bisect_right(self._levels, record.levelno) - 1
+        return self._fmts[max(idx, 0)].format(record)
 
 
 def setup_logger(logger: logging.Logger | None = None) -> None:
     """Add formatting to logger with RichHandler and custom formatter."""
+    from rich.logging import RichHandler  # noqa: PLC0415
+
     logger = logger or logging.getLogger()
     handler = RichHandler(show_time=False, show_path=False, show_level=False, markup=True)
     handler.setFormatter(_LoggerFormatter())
@@ -0,0 +1,15 @@
+"""Guard CLI startup against eagerly importing heavy modules."""
+
+import sys
+
+from python_experiments.utils import run_shell
+
+_DEFERRED_MODULES = ("python_experiments.utils", "logging", "rich.logging", "asyncio")
+
+
+def test_cli_import_is_lazy() -> None:
+    script = "import sys, python_experiments._cli; print('\\n'.join(sys.modules))"
+    modules = set(run_shell([sys.executable, "-c", script], capture_output=True).stdout.splitlines())
+    assert "python_experiments._cli" in modules
+    for module in _DEFERRED_MODULES:
+        assert module not in modules
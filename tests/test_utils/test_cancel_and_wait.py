@@ -9,13 +9,16 @@ import pytest
 
 from python_experiments.utils import cancel_and_wait
 
+# Only the order of side effects matters, so keep the delays short.
+_TICK = 0.1
+
 
 async def model_task(marker: list[str], *, suppress: bool) -> None:
     marker.append("model started")
     try:
-        await asyncio.sleep(1)
+        await asyncio.sleep(_TICK)
     except asyncio.CancelledError:
-        await asyncio.sleep(1)
+        await asyncio.sleep(_TICK)
         marker.append("model cancelled")
         if not suppress:
             raise
@@ -25,7 +28,7 @@ async def model_task(marker: list[str], *, suppress: bool) -> None:
 async def test_cancel_and_wait() -> None:
     marker: list[str] = []
     task = asyncio.create_task(model_task(marker, suppress=False))
-    await asyncio.sleep(0.5)
+    await asyncio.sleep(_TICK / 2)
     await cancel_and_wait(task)
     assert marker == ["model started", "model cancelled"]
 
@@ -43,6 +46,6 @@ async def test_cancel_cancel_and_wait() -> None:
 async def test_cancel_and_wait_suppress() -> None:
     marker: list[str] = []
     task = asyncio.create_task(model_task(marker, suppress=True))
-    await asyncio.sleep(0.5)
+    await asyncio.sleep(_TICK / 2)
     with pytest.raises(RuntimeError):
         await cancel_and_wait(task)
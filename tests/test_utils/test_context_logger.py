@@ -40,6 +40,34 @@ def test_status(*, caplog: pytest.LogCaptureFixture) -> None:
     assert re.search(rf"\[STATUS\s*\] {msg}", caplog.text)
 
 
+def test_invoking_module_logger(*, caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(1)
+
+    with ContextLogger(msg="task"):
+        pass
+    ContextLogger.status("task")
+
+    assert [record.name for record in caplog.records] == [__name__] * 3
+
+
+@pytest.mark.parametrize(
+    ("elapsed", "expected"),
+    [
+        (None, ""),
+        (0, " [0s]"),
+        (0.9, " [0s]"),
+        (300, " [300s]"),
+        (301, " [5m 1s]"),
+        (3605, " [60m 5s]"),
+        (3665, " [1h 1m 5s]"),
+        (96 * 3600, " [96h 0m 0s]"),
+        (97 * 3600 + 1, " [4d 1h 0m 1s]"),
+    ],
+)
+def test_format_elapsed(elapsed: float | None, expected: str) -> None:
+    assert ContextLogger._format_elapsed(elapsed) == expected  # noqa: SLF001
+
+
 def test_exception_context(*, caplog: pytest.LogCaptureFixture) -> None:
     caplog.set_level(1)
 
@@ -93,6 +121,18 @@ async def test_async_exception_context(*, caplog: pytest.LogCaptureFixture) -> N
     assert re.search(rf"\[FINISHED\s*\] {msg}", caplog.text) is None
 
 
+async def test_async_ping_stops_on_exit(*, caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(1)
+
+    async with ContextLogger(msg="task", ping=0.05):
+        await asyncio.sleep(0.12)
+    pings = caplog.text.count("IN PROGRESS")
+    await asyncio.sleep(0.15)
+
+    assert pings > 0
+    assert caplog.text.count("IN PROGRESS") == pings
+
+
 @pytest.mark.xfail(
     raises=RuntimeError, strict=True, reason="ContextLogger does not support double-entry, it leads to UB."
 )
@@ -1,115 +1,176 @@
 import logging
+import os
 from pathlib import Path
-from subprocess import CalledProcessError
+from subprocess import CalledProcessError, CompletedProcess
+from typing import Any
+from unittest.mock import Mock
 
 import pytest
 
 from python_experiments.utils import run_shell, shell_command
 
-
-def test_shell_shlex() -> None:
-    """Test shell_command with basic cases."""
-    assert shell_command(["echo"]) == "echo"
-    assert shell_command(["echo", "echo"]) == "echo echo"
-    assert shell_command(["echo", "--arg1", "--arg2", "--arg3"]) == "echo --arg1 --arg2 --arg3"
-    assert shell_command(["echo", "--path", Path()]) == "echo --path ."
-    assert shell_command(["echo", "--path", Path('"xxx"')]) == "echo --path '\"xxx\"'"
-    assert shell_command(["echo", "$AA"]) == "echo '$AA'"
-
-
-def test_shell_command_extra_env() -> None:
-    """Test shell_command with extra_env parameter."""
-    assert shell_command(["echo"], extra_env={"A": "B"}) == "A=B echo"
-
-
-def test_shell_command_extra_paths() -> None:
-    """Test shell_command with extra_paths parameter."""
-    command = shell_command(["echo"], extra_paths=[Path("path1"), Path("path2")])
-    assert command == 'PATH="path1:path2:${PATH}" echo'
-
-
-def test_shell_command_wrong_path() -> None:
-    """Test shell_command with wrong PATH in extra_env."""
-    with pytest.raises(ValueError, match="Do not pass PATH to extra_env"):
-        shell_command(["echo"], extra_env={"PATH": "a"})
-
-
-def test_shell_command_capture() -> None:
-    """Test shell_command with capture_output parameter."""
-    assert shell_command(["echo"], capture_output=True) == "echo &> CAPTURED"
+SHLEX_CASES = (
+    (["echo"], "echo"),
+    (["echo", "echo"], "echo echo"),
+    (["echo", "--arg1", "--arg2", "--arg3"], "echo --arg1 --arg2 --arg3"),
+    (["echo", "$AA"], "echo '$AA'"),
+)
+PATH_CASES = (
+    (["echo", "--path", Path()], "echo --path ."),
+    (["echo", "--path", Path('"xxx"')], "echo --path '\"xxx\"'"),
+)
+OPTION_CASES = (
+    ({"extra_env": {"A": "B"}}, "A=B echo"),
+    ({"extra_paths": [Path("path1"), Path("path2")]}, 'PATH="path1:path2:${PATH}" echo'),
+    ({"capture_output": True}, "echo &> CAPTURED"),
+)
+
+
+@pytest.mark.parametrize(
+    ("cmd", "kwargs", "expected"),
+    [
+        *[(cmd, {}, expected) for cmd, expected in (*SHLEX_CASES, *PATH_CASES)],
+        *[(["echo"], kwargs, expected) for kwargs, expected in OPTION_CASES],
+    ],
+)
+def test_shell_command_formatting(cmd: list[str | Path], kwargs: dict[str, Any], expected: str) -> None:
+    """Test bash equivalent produced by shell_command."""
+    assert shell_command(cmd, **kwargs) == expected
+
+
+def test_shell_command_cwd(tmp_path: Path) -> None:
+    """Test shell_command with cwd parameter."""
+    assert shell_command(["echo"], cwd=Path.cwd()) == "echo"
+    assert shell_command(["echo"], cwd=Path()) == "echo"
+    assert shell_command(["echo"], cwd=tmp_path) == f"cd {os.path.relpath(tmp_path)} && echo"
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "match"),
+    [
+        ({"extra_env": {"PATH": "a"}}, "Do not pass PATH to extra_env"),
+        ({"extra_paths": [Path("path/with:colon")]}, "Cannot handle colon in paths"),
+    ],
+)
+def test_shell_command_invalid_args(kwargs: dict[str, Any], match: str) -> None:
+    """Test shell_command rejects arguments it cannot represent."""
+    with pytest.raises(ValueError, match=match):
+        shell_command(["echo"], **kwargs)
+
+
+@pytest.fixture
+def fake_run(monkeypatch: pytest.MonkeyPatch) -> Mock:
+    """Record `subprocess.run` arguments instead of spawning a process."""
+    mock = Mock(return_value=CompletedProcess(args=[], returncode=0, stdout="hello\n"))
+    monkeypatch.setattr("python_experiments.utils.subprocess.run", mock)
+    return mock
 
 
 def test_run_shell_basic_execution() -> None:
     """Test basic run_shell execution with simple command."""
-    # Test simple echo command
+    # The only end-to-end check, everything else goes through `fake_run`.
     result = run_shell(["echo", "hello"], capture_output=True)
     assert result.returncode == 0
     assert result.stdout == "hello\n"
 
 
-def test_run_shell_extra_env() -> None:
-    """Test run_shell with extra_env parameter."""
-    # Use a command that can check environment variables
-    result = run_shell(["sh", "-c", "echo $TEST_VAR"], extra_env={"TEST_VAR": "test_value"}, capture_output=True)
-    assert result.returncode == 0
-    assert result.stdout == "test_value\n"
+def test_run_shell_default_args(fake_run: Mock) -> None:
+    """Test run_shell forwards command and defaults to subprocess.run."""
+    result = run_shell(["echo", "hello"], capture_output=True)
+    assert result.stdout == "hello\n"
+    assert fake_run.call_args.args == (["echo", "hello"],)
+    assert fake_run.call_args.kwargs == {
+        "env": None,
+        "check": True,
+        "capture_output": True,
+        "text": True,
+        "cwd": None,
+    }
+
 
+def test_run_shell_no_shell(fake_run: Mock) -> None:
+    """Test run_shell spawns argv directly without wrapping it into a shell."""
+    run_shell(["echo", "$HOME"], extra_env={"A": "B"}, extra_paths=[Path("path1")])
+    assert fake_run.call_args.args == (["echo", "$HOME"],)
+    assert fake_run.call_args.kwargs.get("shell", False) is False
 
-def test_run_shell_extra_paths(tmp_path: Path) -> None:
+
+def test_run_shell_extra_env(fake_run: Mock, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test run_shell with extra_env parameter."""
+    monkeypatch.setenv("INHERITED_VAR", "inherited")
+    run_shell(["printenv", "TEST_VAR"], extra_env={"TEST_VAR": "test_value"}, capture_output=True)
+    env = fake_run.call_args.kwargs["env"]
+    assert env["TEST_VAR"] == "test_value"
+    assert env["INHERITED_VAR"] == "inherited"
+
+
+@pytest.fixture(scope="session")
+def custom_cmd_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Directory with `custom_cmd` executable, which is not in PATH by default."""
+    path = tmp_path_factory.mktemp("custom_cmd")
+    fd = os.open(path / "custom_cmd", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+    try:
+        os.write(fd, b"#!/usr/bin/env sh\necho hello\n")
+        os.fchmod(fd, 0o755)
+    finally:
+        os.close(fd)
+    return path
+
+
+def test_run_shell_extra_paths(custom_cmd_dir: Path) -> None:
     """Test run_shell with extra_paths parameter."""
-    # Test that extra_paths modifies PATH environment variable
-    # We verify this by checking that the PATH includes our tmp_path
-    result = run_shell(
-        ["sh", "-c", "echo $PATH"],
-        extra_paths=[tmp_path],
-        capture_output=True,
-    )
+    # `custom_cmd` can only be found through extra_paths
+    result = run_shell(["custom_cmd"], extra_paths=[custom_cmd_dir], capture_output=True)
     assert result.returncode == 0
-    assert str(tmp_path) in result.stdout
+    assert result.stdout == "hello\n"
 
 
-def test_run_shell_cwd(tmp_path: Path) -> None:
+def test_run_shell_cwd(fake_run: Mock, tmp_path: Path) -> None:
     """Test run_shell with cwd parameter."""
-    # Test with current directory
-    result = run_shell(["pwd"], cwd=tmp_path, capture_output=True)
-    assert result.returncode == 0
-    assert Path(result.stdout.strip()) == tmp_path
+    run_shell(["pwd"], cwd=tmp_path, capture_output=True)
+    assert fake_run.call_args.kwargs["cwd"] == tmp_path
 
 
-def test_run_shell_check() -> None:
+def test_run_shell_check(fake_run: Mock) -> None:
     """Test run_shell with check parameter."""
-    # Test successful command with check=True (default)
-    result = run_shell(["echo", "hello"], check=True)
-    assert result.returncode == 0
+    run_shell(["echo", "hello"], check=True)
+    assert fake_run.call_args.kwargs["check"] is True
 
-    # Test with check=False - should not raise exception
-    result = run_shell(["sh", "-c", "exit 1"], check=False)
-    assert result.returncode == 1
+    run_shell(["false"], check=False)
+    assert fake_run.call_args.kwargs["check"] is False
 
 
-def test_run_shell_loglevel(caplog: pytest.LogCaptureFixture) -> None:
+def test_run_shell_loglevel(fake_run: Mock, caplog: pytest.LogCaptureFixture) -> None:
     """Test run_shell with loglevel parameter."""
     caplog.set_level(logging.INFO)
-    result = run_shell(["echo", "hello"], loglevel=logging.INFO)
-    assert result.returncode == 0
+    run_shell(["echo", "hello"], loglevel=logging.INFO)
+    assert fake_run.called
     # Should have logged the command
     assert len(caplog.records) > 0
     assert "[RUNNING IN SHELL]" in caplog.text
 
 
-def test_run_shell_error_handling() -> None:
+def test_run_shell_loglevel_disabled(fake_run: Mock, caplog: pytest.LogCaptureFixture) -> None:
+    """Test run_shell still validates arguments when the command is not logged."""
+    caplog.set_level(logging.INFO)
+    run_shell(["echo", "hello"], loglevel=logging.DEBUG)
+    assert "[RUNNING IN SHELL]" not in caplog.text
+
+    fake_run.reset_mock()
+    with pytest.raises(ValueError, match="Do not pass PATH to extra_env"):
+        run_shell(["echo"], extra_env={"PATH": "a"}, loglevel=logging.DEBUG)
+    assert not fake_run.called
+
+
+def test_run_shell_error_handling(fake_run: Mock) -> None:
     """Test run_shell error handling."""
-    # Test that exception is raised when check=True (default) and command fails
+    # Errors raised by subprocess.run for check=True are propagated as is
+    fake_run.side_effect = CalledProcessError(1, ["false"])
     with pytest.raises(CalledProcessError):
-        run_shell(["sh", "-c", "exit 1"])
+        run_shell(["false"])
 
     # Test that no exception is raised when check=False
-    result = run_shell(["sh", "-c", "exit 1"], check=False)
+    fake_run.side_effect = None
+    fake_run.return_value = CompletedProcess(args=[], returncode=1)
+    result = run_shell(["false"], check=False)
     assert result.returncode == 1
-
-
-def test_run_shell_colon_in_path() -> None:
-    """Test run_shell error handling."""
-    # Test that exception is raised when check=True (default) and command fails
-    with pytest.raises(ValueError, match="Cannot handle colon in paths"):
-        shell_command(["echo"], extra_paths=[Path("path/with:colon")])
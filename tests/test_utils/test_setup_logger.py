@@ -0,0 +1,23 @@
+import logging
+
+import pytest
+
+from python_experiments.utils import _LoggerFormatter
+
+
+@pytest.mark.parametrize(
+    ("level", "expected"),
+    [
+        (logging.DEBUG - 5, "[grey]msg[/]"),
+        (logging.DEBUG, "[grey]msg[/]"),
+        (logging.INFO - 5, "[grey]msg[/]"),
+        (logging.INFO, "[green]msg[/]"),
+        (logging.WARNING - 5, "[green]msg[/]"),
+        (logging.WARNING, "[yellow][WARNING]: msg[/]"),
+        (logging.ERROR, "[red][ERROR]: msg[/]"),
+        (logging.CRITICAL, "[red][ERROR]: msg[/]"),
+    ],
+)
+def test_formatter_level(level: int, expected: str) -> None:
+    record = logging.LogRecord("test", level, __file__, 0, "msg", None, None)
+    assert _LoggerFormatter().format(record) == expected